@@ -26,7 +26,7 @@ class APSystemsInvalidInverter(Exception):
 class APSystemsData:
   def __init__(self):
     self.last_update             = time.time() - APSYSTEMS_UPD_INTERVAL - 1
-    self.timestamp               = None
+    self.timestamp_bcd           = None
     self.ecu_id                  = None
     self.inverters               = {}
     self.lifetime_energy         = None
@@ -35,13 +35,33 @@ class APSystemsData:
     self.qty_of_inverters        = None
     self.qty_of_online_inverters = None
     self.firmware                = None
+    self._timestamp              = None
+
+  @property
+  def timestamp(self):
+    """ timestamp (human readable YYYY-mm-DD HH:MM:SS), built on demand """
+    if self._timestamp is None and self.timestamp_bcd:
+      # BCD-digits map one-to-one to hex-digits
+      self._timestamp = "%02x%02x-%02x-%02x %02x:%02x:%02x" % tuple(
+        self.timestamp_bcd)
+    return self._timestamp
+
+  def set_timestamp(self,bcd,epoch):
+    """ set raw BCD-timestamp and epoch, invalidate human readable timestamp """
+    self.timestamp_bcd = bcd
+    self.last_update   = epoch
+    self._timestamp    = None
 
 class APSystemsSocket:
   """ socket abstraction for APSystems """
 
   def __init__(self,host,port,pool,debug):
-    if not debug:
-      self._debug = lambda x: None
+    # debug helpers are only loaded if needed
+    if debug:
+      from . import _debug
+      self._dbg = _debug
+    else:
+      self._dbg = None
     self._host = host
     self._port = port
     self._pool = pool
@@ -73,9 +93,16 @@ class APSystemsSocket:
     self._socket_open = False
     self._errors = []
 
-  def _debug(self,msg):
-    """ print debug message """
-    print(msg)
+    # cache for BCD-timestamp decoding: (yyyymmddHH, epoch of full hour)
+    self._hour_key = None
+    self._hour_epoch = 0
+
+  def _raise(self, kind, data, *args):
+    """ add error to error history and raise exception """
+    from . import _errors
+    error = _errors.message(kind, data, *args)
+    _errors.add_error(self._errors, error)
+    raise APSystemsInvalidData(error)
 
   def _send_read_from_socket(self, cmd, buffer):
     try:
@@ -105,7 +132,8 @@ class APSystemsSocket:
       self._sock = self._pool.socket(family=self._pool.AF_INET,
                                     type=self._pool.SOCK_STREAM)
       self._sock.settimeout(self._timeout)
-      self._debug(f"connecting to {self._host}:{self._port} ...")
+      if self._dbg:
+        self._dbg.connect(self._host,self._port)
       self._sock.connect((self._host, self._port))
       self._socket_open = True
     except Exception as err:
@@ -124,9 +152,7 @@ class APSystemsSocket:
     try:
       self._parse_ecu_data(data)
       if data.lifetime_energy == 0:
-        error = f"ECU returned 0 for lifetime energy, this is either a glitch from the ECU or a brand new installed ECU. Raw Data={self._ecu_raw_data}"
-        self._add_error(error)
-        raise APSystemsInvalidData(error)
+        self._raise("lifetime", self._ecu_raw_data)
     except Exception as err:
       raise APSystemsInvalidData(err)
 
@@ -152,29 +178,20 @@ class APSystemsSocket:
   def _aps_int(self, codec, start):
     try:
       return int(binascii.hexlify(codec[(start):(start+2)]), 16)
-    except ValueError as err:
-      debugdata = binascii.hexlify(codec)
-      error = f"Unable to convert binary to int location={start} data={debugdata}"
-      self._add_error(error)
-      raise APSystemsInvalidData(error)
+    except ValueError:
+      self._raise("int", codec, start)
 
   def _aps_short(self, codec, start):
     try:
       return int(binascii.hexlify(codec[(start):(start+1)]), 8)
-    except ValueError as err:
-      debugdata = binascii.hexlify(codec)
-      error = f"Unable to convert binary to short int location={start} data={debugdata}"
-      self._add_error(error)
-      raise APSystemsInvalidData(error)
+    except ValueError:
+      self._raise("short", codec, start)
 
   def _aps_double(self, codec, start):
     try:
       return int (binascii.hexlify(codec[(start):(start+4)]), 16)
-    except ValueError as err:
-      debugdata = binascii.hexlify(codec)
-      error = f"Unable to convert binary to double location={start} data={debugdata}"
-      self._add_error(error)
-      raise APSystemsInvalidData(error)
+    except ValueError:
+      self._raise("double", codec, start)
 
   def _aps_bool(self, codec, start):
     return bool(binascii.hexlify(codec[(start):(start+2)]))
@@ -185,55 +202,50 @@ class APSystemsSocket:
   def _aps_str(self, codec, start, amount):
     return codec[start:(start+amount)].decode('utf-8')
 
-  def _aps_timestamp(self, codec, start, amount):
-    timestr=str(binascii.hexlify(codec[start:(start+amount)]))[2:(amount+2)]
-    return timestr[0:4]+"-"+timestr[4:6]+"-"+timestr[6:8]+" "+timestr[8:10]+":"+timestr[10:12]+":"+timestr[12:14]
+  def _aps_epoch(self, codec, start):
+    """ convert 7 BCD-bytes (YYYYmmDDHHMMSS) to seconds since epoch """
+    b = codec[start:start+7]
+    for x in b:
+      if (x >> 4) > 9 or (x & 0x0F) > 9:
+        self._raise("bcd", codec, start)
+    # cache epoch of the full hour: a DST-change always happens at a full
+    # hour, so adding minutes and seconds is safe
+    hour_key = bytes(b[:5])
+    if hour_key != self._hour_key:
+      bcd = lambda x: (x >> 4)*10 + (x & 0x0F)
+      self._hour_epoch = time.mktime((bcd(b[0])*100+bcd(b[1]),bcd(b[2]),
+                                      bcd(b[3]),bcd(b[4]),0,0,0,-1,-1))
+      self._hour_key = hour_key
+    return (self._hour_epoch +
+            ((b[5] >> 4)*10 + (b[5] & 0x0F))*60 +
+            (b[6] >> 4)*10 + (b[6] & 0x0F))
 
   def _check_ecu_checksum(self, data, cmd):
     datalen = len(data) - 1
     try:
       checksum = int(data[5:9])
-    except ValueError as err:
-      debugdata = binascii.hexlify(data)
-      error = f"could not extract checksum int from '{cmd}' data={debugdata}"
-      self._add_error(error)
-      raise APSystemsInvalidData(error)
+    except ValueError:
+      self._raise("checksum_int", data, cmd)
 
     if datalen != checksum:
-      debugdata = binascii.hexlify(data)
-      error = f"Checksum on '{cmd}' failed checksum={checksum} datalen={datalen} data={debugdata}"
-      self._add_error(error)
-      raise APSystemsInvalidData(error)
+      self._raise("checksum", data, cmd, checksum, datalen)
 
     start_str = self._aps_str(data, 0, 3)
     end_str = self._aps_str(data, len(data) - 4, 3)
 
     if start_str != 'APS':
-      debugdata = binascii.hexlify(data)
-      error = f"Result on '{cmd}' incorrect start signature '{start_str}' != APS data={debugdata}"
-      self._add_error(error)
-      raise APSystemsInvalidData(error)
+      self._raise("start", data, cmd, start_str)
 
     if end_str != 'END':
-      debugdata = binascii.hexlify(data)
-      error = f"Result on '{cmd}' incorrect end signature '{end_str}' != END data={debugdata}"
-      self._add_error(error)
-      raise APSystemsInvalidData(error)
+      self._raise("end", data, cmd, end_str)
 
     return True
 
   def _parse_ecu_data(self, result):
     data = self._ecu_raw_data
     data_len = data.find(b'END')+3
-    self._debug("ecu_raw_data:")
-    self._debug(data[:data_len])
-    self._debug(f"data[9:9+4]:     {data[9:13]}")
-    self._debug(f"ecu_id:          {data[13:25]}")
-    self._debug(f"lifetime energy: {data[27:31]}")
-    self._debug(f"today energy:    {data[35:39]}")
-    self._debug(f"current power:   {data[31:35]}")
-    self._debug(f"data[25:25+2]:   {data[25:27]}")
-    self._debug(60*'-')
+    if self._dbg:
+      self._dbg.ecu_raw(data,data_len)
 
     if self._ecu_raw_data != '' and (self._aps_str(self._ecu_raw_data,9,4)) == '0001':
       self._check_ecu_checksum(data[:data_len+1], "ECU Query")
@@ -252,56 +264,29 @@ class APSystemsSocket:
         vsl = int(self._aps_str(data, 49, 3))
         result.firmware = self._aps_str(data, 52, vsl)
 
-      self._debug(f"{result.ecu_id=}")
-      self._debug(f"{result.lifetime_energy=}")
-      self._debug(f"{result.current_power=}")
-      self._debug(f"{result.today_energy=}")
-      self._debug(f"{result.qty_of_inverters=}")
-      self._debug(f"{result.qty_of_online_inverters=}")
-      self._debug(f"{result.firmware=}")
-      self._debug(60*'-')
-
-  def _parse_signal_data(self, result):
-    data = self._inverter_raw_signal
-    data_len = data.find(b'END')+3
-    self._debug("inverter_raw_data:")
-    self._debug(data[:data_len])
-    self._debug(60*'-')
-    signal_data = {}
-    if (self._inverter_raw_signal != '' and
-        (self._aps_str(self._inverter_raw_signal,9,4)) == '0030'):
-      self._check_ecu_checksum(data[:data_len+1], "Signal Query")
-      if not result.qty_of_inverters:
-        return signal_data
-      location = 15
-      for i in range(0, result.qty_of_inverters):
-        uid = self._aps_uid(data, location)
-        location += 6
-        strength = data[location]
-        location += 1
-        strength = int((strength / 255) * 100)
-        signal_data[uid] = strength
-      return signal_data
+      if self._dbg:
+        self._dbg.ecu_result(result)
 
   def _parse_inverter_data(self, result):
     data = self._inverter_raw_data
     data_len = data.find(b'END')+3
-    self._debug("inverter_raw_data:")
-    self._debug(data[:data_len])
-    self._debug(60*'-')
+    if self._dbg:
+      self._dbg.raw("inverter_raw_data:",data,data_len)
     result.inverters = {}
     if (self._inverter_raw_data != '' and
         (self._aps_str(self._inverter_raw_data,9,4)) == '0002'):
       self._check_ecu_checksum(data[:data_len+1], "Inverter data")
-      istr = ''
       cnt1 = 0
       cnt2 = 26
       if self._aps_str(data, 14, 2) == '00':
-        result.timestamp = self._aps_timestamp(data, 19, 14)
-        result.last_update = self._timestamp2epoch(result.timestamp)
+        result.set_timestamp(bytes(data[19:26]), self._aps_epoch(data, 19))
 
-        inverter_qty = self._aps_int(data, 17) 
-        signal = self._parse_signal_data(result)
+        # signal parser and model decoders are loaded on first use
+        from ._signal import parse_signal_data
+        from ._models import decode
+
+        inverter_qty = self._aps_int(data, 17)
+        signal = parse_signal_data(self, result)
         result.inverters = {}
 
         while cnt1 < inverter_qty:
@@ -310,81 +295,8 @@ class APSystemsSocket:
             inverter_uid = self._aps_uid(data, cnt2)
             inv["uid"] = inverter_uid
             inv["online"] = bool(self._aps_short(data, cnt2 + 6))
-            istr = self._aps_str(data, cnt2 + 7, 2)
             inv["signal"] = signal.get(inverter_uid, 0)
-            if istr in [ '01', '04', '05']:
-              power = []
-              voltages = []
-              inv["frequency"] = self._aps_int(data, cnt2 + 9) / 10
-              if inv["online"]:
-                inv["temperature"] = self._aps_int(data, cnt2 + 11) - 100
-              power.append(self._aps_int(data, cnt2 + 13))
-              voltages.append(self._aps_int(data, cnt2 + 15))
-              power.append(self._aps_int(data, cnt2 + 17))
-              voltages.append(self._aps_int(data, cnt2 + 19))
-              inv_details = {
-              "model" : "YC600/DS3/DS3D-L/DS3-H",
-              "channel_qty" : 2,
-              "power" : power,
-              "voltage" : voltages
-              }
-              inv.update(inv_details)
-              cnt2 = cnt2 + 21
-            elif istr == '02':
-              power = []
-              voltages = []
-              inv["frequency"] = self._aps_int(data, cnt2 + 9) / 10
-              if inv["online"]:
-                inv["temperature"] = self._aps_int(data, cnt2 + 11) - 100
-              power.append(self._aps_int(data, cnt2 + 13))
-              voltages.append(self._aps_int(data, cnt2 + 15))
-              power.append(self._aps_int(data, cnt2 + 17))
-              voltages.append(self._aps_int(data, cnt2 + 19))
-              power.append(self._aps_int(data, cnt2 + 21))
-              voltages.append(self._aps_int(data, cnt2 + 23))
-              power.append(self._aps_int(data, cnt2 + 25))
-              inv_details = {
-              "model" : "YC1000/QT2",
-              "channel_qty" : 4,
-              "power" : power,
-              "voltage" : voltages
-              }
-              inv.update(inv_details)
-              cnt2 = cnt2 + 27
-            elif istr == '03':
-              power = []
-              voltages = []
-              inv["frequency"] = self._aps_int(data, cnt2 + 9) / 10
-              if inv["online"]:
-                inv["temperature"] = self._aps_int(data, cnt2 + 11) - 100
-              power.append(self._aps_int(data, cnt2 + 13))
-              voltages.append(self._aps_int(data, cnt2 + 15))
-              power.append(self._aps_int(data, cnt2 + 17))
-              power.append(self._aps_int(data, cnt2 + 19))
-              power.append(self._aps_int(data, cnt2 + 21))
-              inv_details = {
-              "model" : "QS1",
-              "channel_qty" : 4,
-              "power" : power,
-              "voltage" : voltages
-              }
-              inv.update(inv_details)
-              cnt2 = cnt2 + 23
-            else:
-              cnt2 = cnt2 + 9
+            cnt2 = decode(self, data, cnt2, inv)
             result.inverters[inverter_uid] = inv
           cnt1 = cnt1 + 1
         return
-
-  def __add_error(self, error):
-    ts = time.localtime()
-    self._errors.append("[%04d-%02d-%02d %02d:%02d:%02d] %s" %
-                       (ts.tm_year,ts.tm_mon,ts.tm_mday,
-                        ts.tm_hour,ts.tm_min,ts.tm_sec, error))
-
-  def _timestamp2epoch(self, tstamp):
-    """ convert timestamp to seconds since 01/01/1970 """
-    date,tm = tstamp.split(" ")
-    y,m,d = date.split("-")
-    h,M,s = tm.split(":")
-    return time.mktime((int(y),int(m),int(d),int(h),int(M),int(s),0,-1,-1))
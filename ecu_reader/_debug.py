@@ -0,0 +1,46 @@
+# ----------------------------------------------------------------------------
+# CircuitPython Library for APSystems ECU-x Inverters.
+#
+# Debug helpers. Only imported if debugging is enabled.
+#
+# Author: Bernhard Bablok
+# License: Apache 2.0 (original license)
+#
+# Website: https://github.com/bablokb/circuitpython-ecu_reader
+#
+# ----------------------------------------------------------------------------
+
+""" debug output for APSystemsSocket """
+
+def connect(host,port):
+  """ print connect message """
+  print(f"connecting to {host}:{port} ...")
+
+def raw(label,data,data_len):
+  """ print raw data """
+  print(label)
+  print(data[:data_len])
+  print(60*'-')
+
+def ecu_raw(data,data_len):
+  """ print raw ECU data and its fields """
+  print("ecu_raw_data:")
+  print(data[:data_len])
+  print(f"data[9:9+4]:     {data[9:13]}")
+  print(f"ecu_id:          {data[13:25]}")
+  print(f"lifetime energy: {data[27:31]}")
+  print(f"today energy:    {data[35:39]}")
+  print(f"current power:   {data[31:35]}")
+  print(f"data[25:25+2]:   {data[25:27]}")
+  print(60*'-')
+
+def ecu_result(result):
+  """ print parsed ECU data """
+  print(f"{result.ecu_id=}")
+  print(f"{result.lifetime_energy=}")
+  print(f"{result.current_power=}")
+  print(f"{result.today_energy=}")
+  print(f"{result.qty_of_inverters=}")
+  print(f"{result.qty_of_online_inverters=}")
+  print(f"{result.firmware=}")
+  print(60*'-')
@@ -0,0 +1,73 @@
+# ----------------------------------------------------------------------------
+# CircuitPython Library for APSystems ECU-x Inverters.
+#
+# Incremental energy accounting per inverter and per channel.
+#
+# Author: Bernhard Bablok
+# License: Apache 2.0 (original license)
+#
+# Website: https://github.com/bablokb/circuitpython-ecu_reader
+#
+# ----------------------------------------------------------------------------
+
+""" class EnergyIntegrator - today's energy per inverter and channel """
+
+from ._apsystems import APSYSTEMS_UPD_INTERVAL
+
+ENERGY_MAX_GAP = 3*APSYSTEMS_UPD_INTERVAL
+""" intervals longer than this (seconds) are not integrated """
+
+class EnergyIntegrator:
+  """ integrate channel power of consecutive polls to energy (kWh) """
+
+  def __init__(self,max_gap=ENERGY_MAX_GAP):
+    """ constructor, intervals longer than max_gap seconds are skipped """
+
+    self._max_gap = max_gap
+    self._day_key = None
+    self._last_ts = None
+    # uid -> [epoch of last valid sample, last power, energy per channel]
+    self._state = {}
+
+  def update(self,data):
+    """ add a parsed APSystemsData snapshot """
+
+    ts = data.last_update
+    if data.timestamp_bcd is None or ts == self._last_ts:
+      # no data or no new data from the ECU
+      return
+    self._last_ts = ts
+
+    # reset at day rollover
+    day_key = data.timestamp_bcd[:4]
+    if day_key != self._day_key:
+      self._day_key = day_key
+      self._state = {}
+
+    for uid, inv in data.inverters.items():
+      power = inv.get("power")
+      state = self._state.get(uid)
+      if state is None:
+        if not power:
+          continue
+        state = [None, None, [0.0]*len(power)]
+        self._state[uid] = state
+
+      # offline inverters report no valid power: restart integration
+      if not inv["online"] or not power:
+        state[0] = None
+        continue
+
+      last_ts, last_power, energy = state
+      if last_ts is not None and 0 < ts - last_ts <= self._max_gap:
+        # trapezoidal rule, W*s -> kWh
+        f = (ts - last_ts) / 7200000
+        for i, p in enumerate(power):
+          energy[i] += (p + last_power[i]) * f
+      state[0] = ts
+      state[1] = power
+
+  def asdict(self):
+    """ energy of today as dictionary uid -> {total, channels} (kWh) """
+    return {uid: {"total": sum(state[2]), "channels": list(state[2])}
+            for uid, state in self._state.items()}
@@ -0,0 +1,40 @@
+# ----------------------------------------------------------------------------
+# CircuitPython Library for APSystems ECU-x Inverters.
+#
+# Error messages and error history. Only imported if an error occurs.
+#
+# Author: Bernhard Bablok
+# License: Apache 2.0 (original license)
+#
+# Website: https://github.com/bablokb/circuitpython-ecu_reader
+#
+# ----------------------------------------------------------------------------
+
+""" error messages and error history for APSystemsSocket """
+
+import binascii
+import time
+
+_MESSAGES = {
+  "int": "Unable to convert binary to int location=%d data=%s",
+  "short": "Unable to convert binary to short int location=%d data=%s",
+  "double": "Unable to convert binary to double location=%d data=%s",
+  "bcd": "Invalid BCD timestamp location=%d data=%s",
+  "checksum_int": "could not extract checksum int from '%s' data=%s",
+  "checksum": "Checksum on '%s' failed checksum=%d datalen=%d data=%s",
+  "start": "Result on '%s' incorrect start signature '%s' != APS data=%s",
+  "end": "Result on '%s' incorrect end signature '%s' != END data=%s",
+  "lifetime": ("ECU returned 0 for lifetime energy, this is either a glitch "
+               "from the ECU or a brand new installed ECU. Raw Data=%s"),
+  }
+
+def message(kind,data,*args):
+  """ create error message, data is appended hexlified """
+  return _MESSAGES[kind] % (args + (binascii.hexlify(data),))
+
+def add_error(errors,error):
+  """ add error with timestamp to error history """
+  ts = time.localtime()
+  errors.append("[%04d-%02d-%02d %02d:%02d:%02d] %s" %
+                (ts.tm_year,ts.tm_mon,ts.tm_mday,
+                 ts.tm_hour,ts.tm_min,ts.tm_sec, error))
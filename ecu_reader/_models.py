@@ -0,0 +1,52 @@
+# ----------------------------------------------------------------------------
+# CircuitPython Library for APSystems ECU-x Inverters.
+#
+# Decoders for the various inverter-models. Imported on first use.
+#
+# Author: Bernhard Bablok
+# License: Apache 2.0 (original license)
+#
+# Website: https://github.com/bablokb/circuitpython-ecu_reader
+#
+# ----------------------------------------------------------------------------
+
+""" decode model specific inverter data """
+
+_YC600  = ("YC600/DS3/DS3D-L/DS3-H", 2, "pvpv")
+_YC1000 = ("YC1000/QT2", 4, "pvpvpvp")
+_QS1    = ("QS1", 4, "pvppp")
+
+MODELS = {
+  '01': _YC600,
+  '02': _YC1000,
+  '03': _QS1,
+  '04': _YC600,
+  '05': _YC600,
+  }
+""" model-code -> (model, channel_qty, layout of power/voltage values) """
+
+def decode(sock,data,pos,inv):
+  """ decode inverter record at pos into inv, return pos of next record """
+
+  istr = sock._aps_str(data, pos + 7, 2)
+  if istr not in MODELS:
+    return pos + 9
+
+  model, channel_qty, layout = MODELS[istr]
+  inv["frequency"] = sock._aps_int(data, pos + 9) / 10
+  if inv["online"]:
+    inv["temperature"] = sock._aps_int(data, pos + 11) - 100
+  power = []
+  voltages = []
+  offset = pos + 13
+  for field in layout:
+    if field == 'p':
+      power.append(sock._aps_int(data, offset))
+    else:
+      voltages.append(sock._aps_int(data, offset))
+    offset += 2
+  inv["model"] = model
+  inv["channel_qty"] = channel_qty
+  inv["power"] = power
+  inv["voltage"] = voltages
+  return offset
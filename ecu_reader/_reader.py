@@ -22,7 +22,8 @@ class EcuReader:
 
   # --- constructor   --------------------------------------------------------
 
-  def __init__(self,host,pool,port=8899,debug=False,auto_update=True):
+  def __init__(self,host,pool,port=8899,debug=False,auto_update=True,
+               energy=True):
     """ constructor """
 
     # settings
@@ -33,6 +34,8 @@ class EcuReader:
     self._auto_update = auto_update
     self._inverter = APSystemsSocket(host,port,pool,debug)
     self._data = APSystemsData()
+    self._energy_enabled = energy
+    self._energy = None              # created on first update
 
   # --- update data from inverter   ------------------------------------------
 
@@ -41,6 +44,11 @@ class EcuReader:
 
     if force or (self._auto_update and time.time() - self.next_update() > 0):
       self._inverter.read(self._data)
+      if self._energy_enabled:
+        if not self._energy:
+          from ._energy import EnergyIntegrator
+          self._energy = EnergyIntegrator()
+        self._energy.update(self._data)
 
   # --- return data as dictionary   ------------------------------------------
 
@@ -58,6 +66,7 @@ class EcuReader:
       "qty_of_inverters": self._data.qty_of_inverters,
       "qty_of_online_inverters": self._data.qty_of_online_inverters,
       "firmware": self._data.firmware,
+      "inverter_energy": self._energy.asdict() if self._energy else None,
       }
 
   # --- time of expected next update   ---------------------------------------
@@ -68,6 +77,12 @@ class EcuReader:
 
   # --- properties   ---------------------------------------------------------
 
+  @property
+  def data(self) -> APSystemsData:
+    """ parsed data of last update (e.g. for ecu_reader.analytics) """
+    self.update()
+    return self._data
+
   @property
   def last_update(self) -> int:
     """ timestamp of last update (seconds since epoch)"""
@@ -127,3 +142,10 @@ class EcuReader:
     """ firmware version """
     self.update()
     return self._data.firmware
+
+  @property
+  def inverter_energy(self) -> dict:
+    """ today's energy (kWh) per inverter and channel (None if disabled
+        or not updated yet) """
+    self.update()
+    return self._energy.asdict() if self._energy else None
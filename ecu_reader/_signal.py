@@ -0,0 +1,38 @@
+# ----------------------------------------------------------------------------
+# CircuitPython Library for APSystems ECU-x Inverters.
+#
+# Parser for signal data. Imported on first use.
+#
+# Author: Bernhard Bablok
+# License: Apache 2.0 (original license)
+#
+# Website: https://github.com/bablokb/circuitpython-ecu_reader
+#
+# ----------------------------------------------------------------------------
+
+""" parse signal strength of inverters """
+
+def parse_signal_data(sock,result):
+  """ parse signal data, returns dict uid -> signal strength (percent) """
+
+  data = sock._inverter_raw_signal
+  data_len = data.find(b'END')+3
+  if sock._dbg:
+    sock._dbg.raw("inverter_raw_data:",data,data_len)
+  signal_data = {}
+  if (data != '' and sock._aps_str(data,9,4) == '0030'):
+    sock._check_ecu_checksum(data[:data_len+1], "Signal Query")
+    if not result.qty_of_inverters:
+      return signal_data
+    location = 15
+    for i in range(0, result.qty_of_inverters):
+      # stay within frame (records end before 'END')
+      if location + 7 > data_len - 3:
+        break
+      uid = sock._aps_uid(data, location)
+      location += 6
+      strength = data[location]
+      location += 1
+      strength = int((strength / 255) * 100)
+      signal_data[uid] = strength
+    return signal_data
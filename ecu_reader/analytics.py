@@ -0,0 +1,312 @@
+# ----------------------------------------------------------------------------
+# CircuitPython Library for APSystems ECU-x Inverters.
+#
+# Fleet/history analytics (CPython only, needs NumPy).
+#
+# This module is not imported by the package itself, so the core library
+# stays dependency-free. Import it explicitly:
+#
+#   from ecu_reader import analytics
+#
+# Author: Bernhard Bablok
+# License: Apache 2.0 (original license)
+#
+# Website: https://github.com/bablokb/circuitpython-ecu_reader
+#
+# ----------------------------------------------------------------------------
+
+""" class History - columnar inverter x channel x time arrays """
+
+import contextlib
+import warnings
+
+import numpy as np
+
+from ._apsystems import (APSYSTEMS_UPD_INTERVAL, APSystemsData,
+                         APSystemsSocket, APSystemsInvalidData)
+from ._energy import ENERGY_MAX_GAP
+
+MAX_CHANNELS = 4
+""" maximum number of channels of supported inverter-models """
+
+# --- silence warnings for all-NaN slices   ----------------------------------
+
+@contextlib.contextmanager
+def _nan_quiet():
+  """ suppress NumPy warnings for all-NaN slices and divisions by zero """
+  with warnings.catch_warnings(), np.errstate(invalid="ignore",divide="ignore"):
+    warnings.simplefilter("ignore",category=RuntimeWarning)
+    yield
+
+# --- split a byte-buffer into ECU frames   ----------------------------------
+
+def iter_frames(buffer):
+  """ split a buffer of concatenated ECU responses into single frames """
+
+  pos = 0
+  size = len(buffer)
+  while pos + 9 <= size:
+    if buffer[pos:pos+3] != b'APS':
+      # resync on next frame start
+      nxt = buffer.find(b'APS',pos+1)
+      if nxt < 0:
+        return
+      pos = nxt
+      continue
+    # length field covers everything up to and including 'END', the
+    # frame itself is terminated by an additional newline
+    try:
+      length = int(buffer[pos+5:pos+9])
+    except ValueError:
+      length = 0
+    if length < 9:
+      # corrupt length field
+      pos += 3
+      continue
+    yield bytes(buffer[pos:pos+length+1])
+    pos += length + 1
+
+# --- parse raw frames into APSystemsData   ----------------------------------
+
+def parse_frames(buffer):
+  """ parse raw frames (ECU, inverter and signal query) into snapshots
+
+  Snapshots with invalid frames are skipped.
+  """
+
+  parser = APSystemsSocket(None,None,None,False)
+  ecu = inverter = None
+  for frame in iter_frames(buffer):
+    cmd = frame[9:13]
+    if cmd == b'0001':
+      ecu = frame
+      inverter = None
+    elif cmd == b'0002':
+      inverter = frame
+    elif cmd == b'0030' and ecu and inverter:
+      data = APSystemsData()
+      parser._ecu_raw_data = bytearray(ecu)
+      parser._inverter_raw_data = bytearray(inverter)
+      parser._inverter_raw_signal = bytearray(frame)
+      ecu = inverter = None
+      try:
+        parser._parse_ecu_data(data)
+        parser._parse_inverter_data(data)
+      except (APSystemsInvalidData, IndexError, ValueError):
+        # don't collect the error history of a long replay
+        parser._errors.clear()
+        continue
+      yield data
+
+# --- history of snapshots   -------------------------------------------------
+
+class History:
+  """ collect snapshots of one or more ECUs and provide columnar arrays """
+
+  def __init__(self,resolution=APSYSTEMS_UPD_INTERVAL):
+    """ constructor
+
+    Samples are rounded to the nearest time-bin of width resolution
+    (seconds). If two samples of an inverter fall into the same bin,
+    the one closer to the bin time is kept. With resolution=None every
+    distinct ECU timestamp has its own bin.
+    """
+
+    self._resolution = resolution
+    self._samples = []
+    self._arrays = None
+
+  # --- add data   -----------------------------------------------------------
+
+  def add(self,data):
+    """ add a parsed APSystemsData snapshot """
+
+    epoch = data.last_update
+    if self._resolution:
+      t = int(round(epoch / self._resolution)) * self._resolution
+    else:
+      t = epoch
+    for uid, inv in data.inverters.items():
+      self._samples.append((t,epoch,data.ecu_id,uid,inv))
+    self._arrays = None
+
+  def add_frames(self,buffer):
+    """ add snapshots from a buffer of raw frames """
+
+    for data in parse_frames(buffer):
+      self.add(data)
+
+  def load(self,filename):
+    """ add snapshots from a file with raw frames """
+
+    with open(filename,"rb") as f:
+      self.add_frames(f.read())
+
+  # --- build arrays   -------------------------------------------------------
+
+  def _build(self):
+    """ build columnar arrays from collected samples """
+
+    uids  = sorted({s[3] for s in self._samples})
+    times = sorted({s[0] for s in self._samples})
+    u_idx = {uid: i for i, uid in enumerate(uids)}
+    t_idx = {t: i for i, t in enumerate(times)}
+
+    shape = (len(uids),len(times))
+    power       = np.full(shape+(MAX_CHANNELS,),np.nan)
+    voltage     = np.full(shape+(MAX_CHANNELS,),np.nan)
+    temperature = np.full(shape,np.nan)
+    frequency   = np.full(shape,np.nan)
+    online      = np.zeros(shape,dtype=bool)
+    epochs      = np.full(shape,np.nan)
+    ecu_ids     = [None]*len(uids)
+
+    for t, epoch, ecu_id, uid, inv in self._samples:
+      i = u_idx[uid]
+      j = t_idx[t]
+      if not np.isnan(epochs[i,j]) and abs(epochs[i,j]-t) <= abs(epoch-t):
+        continue
+      ecu_ids[i] = ecu_id
+      epochs[i,j] = epoch
+      online[i,j] = inv.get("online",False)
+      temperature[i,j] = inv.get("temperature",np.nan)
+      frequency[i,j] = inv.get("frequency",np.nan)
+      p = inv.get("power",())
+      v = inv.get("voltage",())
+      power[i,j,:len(p)] = p
+      voltage[i,j,:len(v)] = v
+
+    # public layout is inverter x channel x time
+    self._arrays = {
+      "uids": uids,
+      "ecu_ids": ecu_ids,
+      "times": np.array(times,dtype=np.int64),
+      "epochs": epochs,
+      "power": power.transpose(0,2,1),
+      "voltage": voltage.transpose(0,2,1),
+      "temperature": temperature,
+      "frequency": frequency,
+      "online": online,
+      }
+
+  def _get(self,key):
+    if self._arrays is None:
+      self._build()
+    return self._arrays[key]
+
+  # --- properties   ---------------------------------------------------------
+
+  @property
+  def uids(self) -> list:
+    """ inverter uids (index of first axis) """
+    return self._get("uids")
+
+  @property
+  def ecu_ids(self) -> list:
+    """ ECU id of each inverter """
+    return self._get("ecu_ids")
+
+  @property
+  def times(self):
+    """ start of time-bins (seconds since epoch, index of last axis) """
+    return self._get("times")
+
+  @property
+  def epochs(self):
+    """ ECU timestamp of each sample (inverter x time, NaN if missing) """
+    return self._get("epochs")
+
+  @property
+  def power(self):
+    """ power in W (inverter x channel x time, NaN if missing) """
+    return self._get("power")
+
+  @property
+  def voltage(self):
+    """ voltage in V (inverter x channel x time, NaN if missing) """
+    return self._get("voltage")
+
+  @property
+  def temperature(self):
+    """ temperature in °C (inverter x time, NaN if missing/offline) """
+    return self._get("temperature")
+
+  @property
+  def frequency(self):
+    """ grid frequency in Hz (inverter x time, NaN if missing) """
+    return self._get("frequency")
+
+  @property
+  def online(self):
+    """ online state (inverter x time) """
+    return self._get("online")
+
+  # --- aggregations   -------------------------------------------------------
+
+  def mean_power(self):
+    """ mean power per inverter and channel (inverter x channel) """
+    with _nan_quiet():
+      return np.nanmean(self.power,axis=2)
+
+  def energy(self,max_gap=ENERGY_MAX_GAP):
+    """ energy in Wh per inverter and channel (inverter x channel)
+
+    Uses the ECU timestamps of the samples and the same rules as
+    EnergyIntegrator: bins without data of an inverter are bridged,
+    intervals with an offline sample or longer than max_gap seconds are
+    not counted.
+    """
+    power = self.power
+    epochs = self.epochs
+    online = self.online
+    result = np.zeros(power.shape[:2])
+    with _nan_quiet():
+      # samples without power data break the integration like offline ones
+      has_power = ~np.all(np.isnan(power),axis=1)
+      for i in range(power.shape[0]):
+        idx = np.flatnonzero(~np.isnan(epochs[i]))
+        if len(idx) < 2:
+          continue
+        p = power[i][:,idx]
+        ok = online[i,idx] & has_power[i,idx]
+        dt = np.diff(epochs[i,idx])
+        valid = ok[1:] & ok[:-1] & (dt <= max_gap)
+        e = 0.5*(p[:,1:]+p[:,:-1])*dt/3600
+        result[i] = np.nansum(np.where(valid,e,0.0),axis=1)
+    return result
+
+  def underperformers(self,threshold=0.8):
+    """ channels whose mean power is below threshold * fleet median
+
+    Returns a boolean array (inverter x channel). Channels without data
+    are never flagged.
+    """
+    mean = self.mean_power()
+    with _nan_quiet():
+      median = np.nanmedian(mean)
+      return np.nan_to_num(mean,nan=np.inf) < threshold*median
+
+  def channel_ratio(self):
+    """ power of each channel relative to the inverter's channel mean
+
+    Returns an array (inverter x channel x time). A balanced inverter has
+    values close to 1.0 for all channels.
+    """
+    p = self.power
+    with _nan_quiet():
+      return p / np.nanmean(p,axis=1,keepdims=True)
+
+  def temperature_outliers(self,z=3.5,min_mad=1.0):
+    """ temperature outliers using a robust z-score across inverters
+
+    Temperatures are integers, so the median absolute deviation (MAD) is
+    often zero. It is therefore limited to at least min_mad (°C).
+    Returns a boolean array (inverter x time).
+    """
+    temp = self.temperature
+    with _nan_quiet():
+      median = np.nanmedian(temp,axis=0,keepdims=True)
+      mad = np.nanmedian(np.abs(temp-median),axis=0,keepdims=True)
+      mad = np.maximum(mad,min_mad)
+      score = 0.6745*(temp-median) / mad
+    return np.nan_to_num(np.abs(score),nan=0.0) > z
@@ -0,0 +1,46 @@
+# ----------------------------------------------------------------------------
+# Startup benchmark for the ecu_reader library.
+#
+# This program measures the time and memory needed to import the library
+# and to create an EcuReader object. It does not need network access.
+#
+# Author: Bernhard Bablok
+# License: Apache 2.0 (original license)
+#
+# Website: https://github.com/bablokb/circuitpython-ecu_reader
+#
+# ----------------------------------------------------------------------------
+
+import gc
+import time
+
+# --- helpers   --------------------------------------------------------------
+
+def mem_free():
+  """ free memory (CircuitPython only) """
+  gc.collect()
+  try:
+    return gc.mem_free()
+  except AttributeError:
+    return None
+
+def report(label,t_start,m_start):
+  """ print duration and memory usage since start """
+  duration = (time.monotonic_ns()-t_start)/1e6
+  m_end = mem_free()
+  if m_start is None:
+    print(f"{label:10s}: {duration:8.2f} ms")
+  else:
+    print(f"{label:10s}: {duration:8.2f} ms, {m_start-m_end:6d} bytes")
+
+# --- main program   ----------------------------------------------------------
+
+m_start = mem_free()
+t_start = time.monotonic_ns()
+import ecu_reader
+report("import",t_start,m_start)
+
+m_start = mem_free()
+t_start = time.monotonic_ns()
+inverter = ecu_reader.EcuReader("127.0.0.1",None,auto_update=False)
+report("create",t_start,m_start)
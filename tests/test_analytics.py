@@ -0,0 +1,121 @@
+# ----------------------------------------------------------------------------
+# Tests for ecu_reader.analytics (CPython only, needs NumPy).
+#
+# Author: Bernhard Bablok
+# License: Apache 2.0 (original license)
+#
+# Website: https://github.com/bablokb/circuitpython-ecu_reader
+#
+# ----------------------------------------------------------------------------
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ecu_reader import analytics
+from ecu_reader._energy import EnergyIntegrator
+
+UID_A = "801000000001"
+UID_B = "801000000002"
+
+# --- helpers to create raw ECU frames   -------------------------------------
+
+def _frame(head):
+  """ fill in length field and append end signature """
+  head[5:9] = b"%04d" % (len(head)+3)
+  return bytes(head) + b"END\n"
+
+def _ecu_frame(qty):
+  head = bytearray(b"APS11xxxx0001216000012345" + b"01")
+  head += (12345).to_bytes(4,"big") + (500).to_bytes(4,"big")
+  head += (321).to_bytes(4,"big")
+  head += bytes(46-len(head)) + qty.to_bytes(2,"big") + qty.to_bytes(2,"big")
+  head += bytes(2) + b"003" + b"1.0"
+  return _frame(head)
+
+def _inverter_frame(ts,inverters):
+  head = bytearray(b"APS11xxxx0002x001") + len(inverters).to_bytes(2,"big")
+  head += bytes.fromhex(ts)
+  for uid, online, power, *temp in inverters:
+    temp = temp[0] if temp else 40
+    head += bytes.fromhex(uid) + bytes([online]) + b"01"
+    head += (500).to_bytes(2,"big") + (temp+100).to_bytes(2,"big")
+    for p in power:
+      head += p.to_bytes(2,"big") + (230).to_bytes(2,"big")
+  return _frame(head)
+
+def _signal_frame(uids):
+  head = bytearray(b"APS11xxxx0030xx")
+  for uid in uids:
+    head += bytes.fromhex(uid) + bytes([200])
+  return _frame(head)
+
+def _poll(ts,inverters):
+  return (_ecu_frame(len(inverters)) + _inverter_frame(ts,inverters) +
+          _signal_frame([inv[0] for inv in inverters]))
+
+# --- tests   ----------------------------------------------------------------
+
+def test_jittered_polls_keep_all_samples():
+  times = ["20241019100459","20241019101001","20241019101458",
+           "20241019102002","20241019102500"]
+  buffer = b"".join(_poll(ts,[(UID_A,1,(100,200))]) for ts in times)
+
+  history = analytics.History()
+  history.add_frames(buffer)
+  assert history.power.shape == (1,analytics.MAX_CHANNELS,len(times))
+  assert not np.isnan(history.epochs).any()
+
+def test_energy_matches_integrator():
+  polls = [
+    ("20241019170000",[(UID_A,1,(100,100)),(UID_B,1,(100,100))]),
+    ("20241020080459",[(UID_A,1,(100,120)),(UID_B,1,(100,100))]),
+    ("20241020081001",[(UID_A,1,(150,120)),(UID_B,0,(0,0))]),
+    ("20241020081458",[(UID_A,1,(200,130)),(UID_B,1,(90,80))]),
+    ("20241020082002",[(UID_A,1,(210,140)),(UID_B,1,(95,85))]),
+    ("20241020083500",[(UID_A,1,(220,150)),(UID_B,1,(99,90))]),
+    ("20241020084000",[(UID_A,1,(230,160)),(UID_B,1,(99,90))]),
+    ]
+  buffer = b"".join(_poll(ts,invs) for ts, invs in polls)
+
+  history = analytics.History()
+  history.add_frames(buffer)
+  integrator = EnergyIntegrator()
+  for data in analytics.parse_frames(buffer):
+    integrator.update(data)
+
+  expected = integrator.asdict()
+  energy = history.energy()
+  for i, uid in enumerate(history.uids):
+    channels = expected[uid]["channels"]
+    assert energy[i,:len(channels)] == pytest.approx(
+      [e*1000 for e in channels])
+
+def test_iter_frames_skips_corrupt_length():
+  good = _signal_frame([UID_A])
+  frames = list(analytics.iter_frames(b"APS11-001xxxx" + good))
+  assert frames == [good]
+
+def test_parse_frames_skips_invalid_snapshots():
+  bad_checksum = bytearray(_poll("20241019100000",[(UID_A,1,(100,100))]))
+  bad_checksum[5:9] = b"0099"
+  short_signal = (_ecu_frame(2) +
+                  _inverter_frame("20241019100500",[(UID_A,1,(100,100))]) +
+                  _signal_frame([UID_A]))
+  good = _poll("20241019101000",[(UID_A,1,(100,100))])
+
+  snapshots = list(analytics.parse_frames(bytes(bad_checksum) + short_signal +
+                                          good))
+  assert [data.timestamp for data in snapshots] == ["2024-10-19 10:05:00",
+                                                    "2024-10-19 10:10:00"]
+
+def _outliers(temps):
+  uids = ["8010000000%02d" % i for i in range(len(temps))]
+  history = analytics.History()
+  history.add_frames(_poll("20241019100000",
+                           [(uid,1,(100,100),t) for uid, t in zip(uids,temps)]))
+  return history.temperature_outliers()[:,0].tolist()
+
+def test_temperature_outliers_with_zero_mad():
+  assert _outliers([40,40,40,41]) == [False,False,False,False]
+  assert _outliers([40,40,40,60]) == [False,False,False,True]